@@ -10,32 +10,67 @@
 
 Usage:
     cd /path/to/openbmb.github.io/develop/edit_tool
-    python server.py [--port 8080]
+    python server.py [--port 8080] [--quiet]
 """
 
 import json
 import os
 import re
 import subprocess
+import sys
+import uuid
 import argparse
 import base64
+import contextlib
+import errno
+import functools
+import gzip
+import hashlib
+import itertools
+import logging
+import logging.handlers
 import mimetypes
+import queue
 import tempfile
 import shutil
-import traceback
 import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from html.parser import HTMLParser
 from http.server import HTTPServer, SimpleHTTPRequestHandler
-from socketserver import ThreadingMixIn
 from pathlib import Path
+from typing import Optional
 from urllib.parse import urlparse, parse_qs
 
 try:
     import requests as requests_lib
     import urllib3
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 except ImportError:
     requests_lib = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# pybase64 为 SIMD 加速实现，接口与标准库 base64 一致（异常同为 binascii.Error）
+try:
+    import pybase64 as base64_lib
+except ImportError:
+    base64_lib = base64
+
+
+# 日志：请求线程只把记录放入队列，由 QueueListener 线程统一写出（见 _setup_logging）
+logger = logging.getLogger("edit_tool")
+
 
 # 路径配置
 SCRIPT_DIR = Path(__file__).parent
@@ -43,11 +78,83 @@ CONFIG_DIR = SCRIPT_DIR / "config"
 RESOURCES_DIR = SCRIPT_DIR / "resources"
 REPO_ROOT = SCRIPT_DIR.parent.parent
 BUILD_SCRIPT = SCRIPT_DIR.parent / "minicpm-o-4_5" / "build.py"
+OUTPUT_DIR = REPO_ROOT / "minicpm-o-4_5"
+
+# 常用文件路径（模块加载时计算一次，请求处理时直接复用）
+DATA_FILE = CONFIG_DIR / "data.json"
+DEMO_DATA_JS = OUTPUT_DIR / "data.js"
+CASES_FILE = SCRIPT_DIR.parent / "minicpm-o-4_5" / "config" / "cases.json"
+AUDIO_RESOURCES_DIR = RESOURCES_DIR / "audio"
+ASR_CACHE_DIR = CONFIG_DIR / "asr_cache"
+
+# 上传路径校验用的真实根目录（解析符号链接后）
+_RESOURCES_ROOT = RESOURCES_DIR.resolve()
+
+# 请求处理中使用的路径字符串（模块加载时转换一次，避免每次请求做 Path 拼接 / str()）
+_REPO_ROOT_STR = str(REPO_ROOT)
+_BUILD_SCRIPT_STR = str(BUILD_SCRIPT)
+_RESOURCES_PREFIX = str(RESOURCES_DIR) + os.sep
+_OUTPUT_PREFIX = str(OUTPUT_DIR) + os.sep
+
+# 请求体上限（音频以 base64 上传，体积约为原文件的 4/3）
+MAX_BODY_BYTES = 100 * 1024 * 1024
+# 纯 JSON 接口（保存数据、导入 session）的请求体上限
+MAX_JSON_BODY_BYTES = 16 * 1024 * 1024
+_READ_CHUNK_SIZE = 64 * 1024
+
+# base64 分块解码时每块的字符数（须为 4 的倍数）
+_B64_CHUNK_CHARS = 64 * 1024
+
+# ASR 请求体中音频 base64 的占位符（序列化后替换为实际数据）
+_AUDIO_DATA_PLACEHOLDER = "__AUDIO_BASE64__"
+
+# 远程文件流式下载的分块大小
+_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# 导入 session 时并发下载的文件数
+_IMPORT_DOWNLOAD_WORKERS = 8
+
+# 文件发送回退路径（无 sendfile）的分块大小
+_COPY_CHUNK_SIZE = 64 * 1024
+
+# 音频目录文件列表缓存：dir path -> (mtime_ns, frozenset(文件名))
+_dir_listing_cache: dict = {}
+_dir_listing_lock = threading.Lock()
+
+# 常见音频扩展名的 Content-Type（命中时无需查询 mimetypes 表）
+_AUDIO_MIME = {
+    '.mp3': 'audio/mpeg',
+    '.wav': 'audio/wav',
+    '.ogg': 'audio/ogg',
+    '.m4a': 'audio/mp4',
+}
+
+# data.js 中 DEMO_DATA 赋值的前缀
+_DEMO_DATA_PREFIX = b"const DEMO_DATA = "
+
+# 已确认存在的目录（避免每次上传都 mkdir 整条路径）
+_known_dirs: set = set()
+_known_dirs_lock = threading.Lock()
+
+
+def _ensure_dir(path: Path, force: bool = False) -> None:
+    """确保目录存在，已创建过的目录直接跳过
+
+    Args:
+        path: 目录路径
+        force: 忽略缓存重新 mkdir（目录可能已被外部删除时使用）
+    """
+    key = str(path)
+    if not force and key in _known_dirs:
+        return
+    path.mkdir(parents=True, exist_ok=True)
+    with _known_dirs_lock:
+        _known_dirs.add(key)
+
 
 # 确保目录存在
-CONFIG_DIR.mkdir(exist_ok=True)
-RESOURCES_DIR.mkdir(exist_ok=True)
-(RESOURCES_DIR / "audio").mkdir(exist_ok=True)
+_ensure_dir(CONFIG_DIR)
+_ensure_dir(RESOURCES_DIR)
+_ensure_dir(AUDIO_RESOURCES_DIR)
 
 
 # === 远程 Session 导入支持 ===
@@ -74,10 +181,355 @@ _ENV = _load_env()
 GEMINI_API_KEY = _ENV.get("GEMINI_API_KEY", "")
 GEMINI_BASE_URL = _ENV.get("GEMINI_BASE_URL", "")
 GEMINI_MODEL = _ENV.get("GEMINI_MODEL", "")
+# 单个导入任务内并发转录的音频数（受 Gemini 并发限制，可在 .env 中调整）
+# 非法取值（如非整数）回退为默认值 4，不影响服务器启动
+try:
+    ASR_CONCURRENCY = max(1, int(_ENV.get("ASR_CONCURRENCY", "4") or 4))
+except ValueError:
+    ASR_CONCURRENCY = 4
+# ASR 缓存文件名中的模型部分（模型名可能含 "/" 等字符，加载时清洗一次）
+_ASR_CACHE_MODEL_KEY = re.sub(r'[^\w.-]', '_', GEMINI_MODEL) or "default"
+
+# 后台 ASR 任务跟踪：case_id -> 状态快照 {"total", "completed", "results", "errors", "done", "version"}
+# 快照只读，更新时整体替换（见 _publish_transcription_status），普通查询无需加锁
+_transcription_tasks: dict = {}
+# 发布新快照时通知（GET /api/transcription-status?since=<version> 长轮询等待）
+_transcription_cond = threading.Condition()
+_TRANSCRIPTION_POLL_TIMEOUT = 20  # 长轮询最长等待秒数
+
+# 后台构建任务跟踪
+_build_jobs: dict = {}  # job_id -> {"status", "returncode", "log", "lines"}
+_build_lock = threading.Lock()
+# 构建有新输出或结束时通知（GET /api/build/{job_id}/log 流式读取）
+_build_cond = threading.Condition(_build_lock)
+_BUILD_LOG_MAX_LINES = 10000  # 每个构建任务最多保留的输出行数
+_BUILD_JOBS_KEEP = 8  # 最多保留的构建任务记录数
+
+def _json_dumps(data, indent: bool = False) -> bytes:
+    """序列化为 UTF-8 JSON bytes（优先使用 orjson，否则回退到标准库）
+
+    Args:
+        data: 待序列化对象
+        indent: 是否使用 2 空格缩进（否则输出紧凑格式）
+
+    Returns:
+        JSON bytes（非 ASCII 字符不转义）
+    """
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _json_loads(raw):
+    """解析 JSON（优先使用 orjson），raw 可以是 str / bytes / bytearray
+
+    Raises:
+        json.JSONDecodeError: JSON 格式错误（orjson 的异常同为其子类）
+    """
+    if orjson:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+# 响应体超过该大小且客户端支持时才做 gzip 压缩
+GZIP_MIN_BYTES = 4096
+
+# 数据文件解析缓存：path -> {"mtime_ns", "size", "etag", "data", "body", "gzip_body", "br_body"}
+_data_cache: dict = {}
+_data_cache_lock = threading.Lock()
+
+# 静态文本资源的 gzip 缓存：path -> {"mtime_ns", "size", "etag", "gzip_body"}
+_static_gzip_cache: dict = {}
+_static_gzip_lock = threading.Lock()
+_GZIP_STATIC_SUFFIXES = {'.html', '.js', '.css', '.json', '.svg'}
+
+# 串行化 data.json 的保存（写文件 + 预热缓存），避免并发保存时缓存与磁盘内容错配
+_save_lock = threading.Lock()
+
+
+# 数据文件来源，按优先级排列
+_DATA_SOURCES = ((DATA_FILE, "编辑器配置"), (DEMO_DATA_JS, "data.js"), (CASES_FILE, "cases.json"))
+
+
+def _resolve_data_path():
+    """按优先级返回当前生效的数据文件
+
+    优先级：config/data.json > minicpm-o-4_5/data.js > config/cases.json
+    直接 stat 代替 exists() + 之后再 stat，命中时一次系统调用即可，
+    返回的 stat 结果供缓存校验复用。
+
+    Returns:
+        (path, 来源描述, stat 结果)；均不存在时返回 (None, None, None)
+    """
+    for path, label in _DATA_SOURCES:
+        try:
+            return path, label, os.stat(path)
+        except FileNotFoundError:
+            continue
+    return None, None, None
+
+
+def _make_etag(st: os.stat_result) -> str:
+    """由文件 (mtime, size) 生成弱 ETag"""
+    return f'W/"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+def _load_json_cached(path: Path, st: Optional[os.stat_result] = None) -> dict:
+    """读取并解析 JSON / data.js 文件，按 (mtime, size) 缓存
+
+    文件未变化时直接返回缓存，避免重复读盘、DEMO_DATA 提取和 JSON 解析；
+    同时缓存序列化后的（紧凑）响应体及其 gzip 版本，重复 GET 无需再次编码/压缩。
+
+    Args:
+        path: data.json / cases.json / data.js 路径
+        st: 调用方已取得的 stat 结果（省略时重新 stat）
+
+    Returns:
+        缓存条目 {"mtime_ns", "size", "etag", "data", "body", "gzip_body", "br_body"}，
+        etag 由 (mtime, size) 生成，body 为 UTF-8 编码的 JSON bytes，
+        gzip_body / br_body 在 body 较小时为 None，br_body 在未安装 brotli 时为 None
+
+    Raises:
+        ValueError: data.js 中找不到 DEMO_DATA
+    """
+    if st is None:
+        st = path.stat()
+    with _data_cache_lock:
+        cached = _data_cache.get(path)
+    if cached and cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size:
+        return cached
+
+    content = path.read_bytes()
+    if path.suffix == '.js':
+        content = _extract_demo_data(content, path.name)
+    return _cache_data(path, st, _json_loads(content))
+
+
+def _extract_demo_data(content: bytes, name: str) -> bytes:
+    """从 data.js 内容中截取 DEMO_DATA 的 JSON 部分
+
+    直接按前缀与最后一个 "};" 定位后切片，不用 DOTALL 正则扫描全文，
+    也无需先把整个文件解码成 str。
+
+    Raises:
+        ValueError: 找不到 DEMO_DATA
+    """
+    start = content.find(_DEMO_DATA_PREFIX)
+    if start < 0:
+        raise ValueError(f"Could not parse {name}")
+    start = content.find(b"{", start + len(_DEMO_DATA_PREFIX))
+    end = content.rfind(b"};")
+    if start < 0 or end < start:
+        raise ValueError(f"Could not parse {name}")
+    return content[start:end + 1]
+
+
+def _cache_data(path: Path, st: os.stat_result, data) -> dict:
+    """为已解析的数据生成缓存条目（序列化 + gzip / brotli 压缩）并写入缓存
+
+    压缩只在缓存填充时做一次，因此使用较高的压缩级别。
+
+    Args:
+        path: 数据文件路径
+        st: 该文件当前的 stat 结果
+        data: 已解析的数据
+
+    Returns:
+        缓存条目
+    """
+    body = _json_dumps(data)
+    gzip_body = None
+    br_body = None
+    if len(body) > GZIP_MIN_BYTES:
+        gzip_body = gzip.compress(body, compresslevel=6)
+        if brotli:
+            br_body = brotli.compress(body, quality=5)
+
+    entry = {
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "etag": _make_etag(st),
+        "data": data,
+        "body": body,
+        "gzip_body": gzip_body,
+        "br_body": br_body
+    }
+    with _data_cache_lock:
+        _data_cache[path] = entry
+    return entry
+
+
+def _load_static_gzip(path: str, st: os.stat_result) -> dict:
+    """读取静态文本资源并 gzip 压缩，按 (mtime, size) 缓存
+
+    Args:
+        path: 文件路径
+        st: 该文件当前的 stat 结果
+
+    Returns:
+        缓存条目 {"mtime_ns", "size", "etag", "gzip_body"}
+    """
+    with _static_gzip_lock:
+        cached = _static_gzip_cache.get(path)
+    if cached and cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size:
+        return cached
+
+    with open(path, 'rb') as f:
+        content = f.read()
+    entry = {
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "etag": _make_etag(st),
+        "gzip_body": gzip.compress(content, compresslevel=6)
+    }
+    with _static_gzip_lock:
+        _static_gzip_cache[path] = entry
+    return entry
+
+
+def _replace_mode(path: Path) -> int:
+    """整体替换 path 时新文件应使用的权限：沿用原文件权限，不存在时为 0644"""
+    try:
+        return path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        return 0o644
+
+
+@contextlib.contextmanager
+def _atomic_open(path: Path):
+    """原子写入文件：写同目录临时文件，正常退出时 os.replace 覆盖目标
+
+    写入中途出错不会留下半截文件，读者要么看到旧内容要么看到新内容；
+    替换前先 fsync，断电后也不会出现目标文件被替换成空文件的情况。
+
+    Yields:
+        以 'wb' 打开的临时文件对象
+    """
+    mode = _replace_mode(path)
+    tmp_kwargs = {"dir": str(path.parent), "prefix": f".{path.name}.", "suffix": ".tmp"}
+    try:
+        fd, tmp_path = tempfile.mkstemp(**tmp_kwargs)
+    except FileNotFoundError:
+        # 目录可能已被外部删除，重建后重试
+        _ensure_dir(path.parent, force=True)
+        fd, tmp_path = tempfile.mkstemp(**tmp_kwargs)
+    try:
+        # mkstemp 创建的文件权限为 0600，沿用原文件权限
+        os.fchmod(fd, mode)
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _atomic_write_bytes(path: Path, content: bytes) -> None:
+    """原子写入 bytes 到文件（见 _atomic_open）"""
+    with _atomic_open(path) as f:
+        f.write(content)
+
+
+# JSON 上传请求体中 data 字段的起始标记（JSON.stringify 输出无空格）
+_UPLOAD_DATA_KEY = b'"data":"'
 
-# 后台 ASR 任务跟踪
-_transcription_tasks: dict = {}  # case_id -> {"total", "completed", "results", "errors", "done"}
-_transcription_lock = threading.Lock()
+
+def _split_upload_payload(body: bytearray):
+    """拆分 JSON 上传请求体，返回 (其余字段, base64 数据)
+
+    快速路径：直接在请求体中定位 data 字段的字符串值并返回其 memoryview，
+    去掉该值后的剩余部分（只有几十字节）再做 JSON 解析确认结构；
+    base64 数据不会被解析成 str。格式不符（有空格、转义等）时回退为完整 JSON 解析。
+
+    Args:
+        body: 请求体
+
+    Returns:
+        (payload, data)：payload 为解析后的 dict，data 为 base64 的 memoryview 或 str
+
+    Raises:
+        json.JSONDecodeError: JSON 格式错误
+    """
+    start = body.find(_UPLOAD_DATA_KEY)
+    if start >= 0:
+        start += len(_UPLOAD_DATA_KEY)
+        end = body.find(b'"', start)
+        if end >= 0 and body.find(b'\\', start, end) < 0:
+            try:
+                payload = _json_loads(body[:start] + body[end:])
+            except json.JSONDecodeError:
+                payload = None
+            if isinstance(payload, dict) and payload.get('data') == '':
+                return payload, memoryview(body)[start:end]
+
+    payload = _json_loads(body)
+    return payload, payload.get('data', '')
+
+
+def _decode_base64_to(b64, out) -> int:
+    """分块解码 base64 并写入文件，不生成完整的解码副本
+
+    每块长度为 4 的倍数，可独立解码；若数据中夹杂换行等字符导致分块错位，
+    回退为整体解码。
+
+    Args:
+        b64: base64 数据（str 或 bytes-like）
+        out: 以 'wb' 打开的文件对象
+
+    Returns:
+        解码后的字节数
+
+    Raises:
+        binascii.Error: base64 数据非法
+    """
+    total = 0
+    try:
+        for start in range(0, len(b64), _B64_CHUNK_CHARS):
+            chunk = base64_lib.b64decode(b64[start:start + _B64_CHUNK_CHARS])
+            out.write(chunk)
+            total += len(chunk)
+    except base64.binascii.Error:
+        out.seek(0)
+        out.truncate()
+        data = base64_lib.b64decode(b64)
+        out.write(data)
+        total = len(data)
+    return total
+
+
+def _make_http_session():
+    """创建共享的 requests Session（远程下载与 Gemini ASR 共用）
+
+    连接池复用 TCP/TLS 连接，避免每次请求重新握手；
+    对 GET 下载的 429 / 5xx 做少量退避重试，最终失败仍由 raise_for_status 抛出 HTTPError。
+    POST（Gemini ASR，按次计费）不按状态码重发，失败直接交给调用方报错；
+    连接建立失败时请求尚未发出，仍会重试。
+    """
+    session = requests_lib.Session()
+    session.verify = False
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=2,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False
+        )
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+_http = _make_http_session() if requests_lib else None
 
 
 def _download_url(url: str, username: str, password: str) -> bytes:
@@ -98,14 +550,42 @@ def _download_url(url: str, username: str, password: str) -> bytes:
     if not requests_lib:
         raise RuntimeError("需要安装 requests 库: pip install requests")
     auth = (username, password) if username else None
-    resp = requests_lib.get(url, auth=auth, timeout=120, verify=False)
+    resp = _http.get(url, auth=auth, timeout=120)
     resp.raise_for_status()
     return resp.content
 
 
+def _download_url_to_file(url: str, username: str, password: str, dest_path: Path) -> None:
+    """流式下载 URL 内容到文件（支持 Basic Auth）
+
+    按 1 MiB 分块边收边写，不在内存中保留完整响应体，适合音频等大文件。
+
+    Args:
+        url: 目标 URL
+        username: Basic Auth 用户名
+        password: Basic Auth 密码
+        dest_path: 保存路径
+
+    Raises:
+        RuntimeError: requests 未安装
+        requests.HTTPError: 请求失败
+    """
+    if not requests_lib:
+        raise RuntimeError("需要安装 requests 库: pip install requests")
+    auth = (username, password) if username else None
+    with _http.get(url, auth=auth, timeout=120, stream=True) as resp:
+        resp.raise_for_status()
+        with open(dest_path, 'wb') as f:
+            for chunk in resp.iter_content(chunk_size=_DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+
+
 def _transcribe_audio(audio_path: Path) -> str:
     """使用 Gemini API 转录音频文件为文本
 
+    结果按 (音频内容 sha256, 模型名) 缓存在 ASR_CACHE_DIR，
+    重复导入相同音频时直接返回缓存，不再请求 API。
+
     Args:
         audio_path: 本地音频文件路径
 
@@ -122,34 +602,47 @@ def _transcribe_audio(audio_path: Path) -> str:
         raise RuntimeError("缺少 ASR 配置，请在 develop/edit_tool/.env 中设置 GEMINI_API_KEY 和 GEMINI_BASE_URL")
 
     with open(audio_path, "rb") as f:
-        audio_b64 = base64.b64encode(f.read()).decode("utf-8")
+        audio_bytes = f.read()
+
+    cache_file = ASR_CACHE_DIR / f"{hashlib.sha256(audio_bytes).hexdigest()}_{_ASR_CACHE_MODEL_KEY}.txt"
+    try:
+        return cache_file.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        pass
+
+    audio_b64 = base64_lib.b64encode(audio_bytes)
+    del audio_bytes
 
     suffix = audio_path.suffix.lower().lstrip(".")
     audio_format = suffix if suffix in ("wav", "mp3", "flac", "ogg") else "wav"
 
-    resp = requests_lib.post(
+    payload = {
+        "model": GEMINI_MODEL,
+        "messages": [
+            {
+                "role": "system",
+                "content": "你是一个音频转录助手。用户会发送音频，你只需输出音频中说话人的原文文本，保留自然的标点符号。不要添加任何解释、翻译或额外内容。"
+            },
+            {
+                "role": "user",
+                "content": [
+                    {"type": "input_audio", "input_audio": {"data": _AUDIO_DATA_PLACEHOLDER, "format": audio_format}},
+                    {"type": "text", "text": "transcribe"}
+                ]
+            }
+        ]
+    }
+    # base64 字符无需 JSON 转义：先序列化小结构，再把 base64 bytes 原样拼入占位符处，
+    # 省去把音频 base64 解码成 str 再逐字符转义编码的过程
+    head, _, tail = _json_dumps(payload).partition(_AUDIO_DATA_PLACEHOLDER.encode())
+
+    resp = _http.post(
         f"{GEMINI_BASE_URL}/chat/completions",
         headers={
             "Content-Type": "application/json",
             "Authorization": f"Bearer {GEMINI_API_KEY}",
         },
-        json={
-            "model": GEMINI_MODEL,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "你是一个音频转录助手。用户会发送音频，你只需输出音频中说话人的原文文本，保留自然的标点符号。不要添加任何解释、翻译或额外内容。"
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "input_audio", "input_audio": {"data": audio_b64, "format": audio_format}},
-                        {"type": "text", "text": "transcribe"}
-                    ]
-                }
-            ]
-        },
-        verify=False,
+        data=b"".join((head, audio_b64, tail)),
         timeout=300
     )
     resp.raise_for_status()
@@ -158,12 +651,30 @@ def _transcribe_audio(audio_path: Path) -> str:
     # 清理可能残留的指令文本
     for noise in ["请转录这段音频的内容", "只输出转录的原文文本", "不要添加任何解释或标点修正"]:
         raw = raw.replace(noise, "")
-    return raw.strip()
+    text = raw.strip()
+
+    try:
+        _ensure_dir(ASR_CACHE_DIR)
+        _atomic_write_bytes(cache_file, text.encode("utf-8"))
+    except OSError as e:
+        logger.warning(f"[asr] 写入缓存失败: {cache_file.name} ({e})")
+    return text
+
+
+@functools.lru_cache(maxsize=1)
+def _ffmpeg_path() -> Optional[str]:
+    """ffmpeg 可执行文件路径（只查找一次 PATH；未安装时为 None）"""
+    return shutil.which('ffmpeg')
 
 
 def _convert_wav_to_mp3(src: Path, dst: Path) -> bool:
     """尝试使用 ffmpeg 将 wav 转为 mp3
 
+    ffmpeg 路径只解析一次，未安装时直接返回 False，不再逐个文件尝试启动进程；
+    关闭 stdin 交互、横幅和进度输出，减少每次启动的开销。
+    ffmpeg 输出到同目录临时文件，成功后 os.replace 覆盖 dst（新 inode）：
+    不会原地改写 dst，与其硬链接的已构建文件不受影响，转码失败也不会留下半截文件。
+
     Args:
         src: 源 wav 文件
         dst: 目标 mp3 文件
@@ -171,14 +682,55 @@ def _convert_wav_to_mp3(src: Path, dst: Path) -> bool:
     Returns:
         转换是否成功
     """
+    ffmpeg = _ffmpeg_path()
+    if not ffmpeg:
+        return False
+    fd, tmp_path = tempfile.mkstemp(dir=str(dst.parent), prefix=f".{dst.name}.", suffix=".mp3")
     try:
+        # mkstemp 创建的文件权限为 0600，沿用原文件权限
+        os.fchmod(fd, _replace_mode(dst))
+        os.close(fd)
         result = subprocess.run(
-            ['ffmpeg', '-i', str(src), '-y', '-codec:a', 'libmp3lame', '-qscale:a', '2', str(dst)],
+            [ffmpeg, '-nostdin', '-hide_banner', '-loglevel', 'error',
+             '-i', str(src), '-y', '-vn', '-codec:a', 'libmp3lame', '-qscale:a', '2', tmp_path],
             capture_output=True, text=True, timeout=30
         )
-        return result.returncode == 0
+        if result.returncode == 0:
+            os.replace(tmp_path, dst)
+            return True
     except (FileNotFoundError, subprocess.TimeoutExpired):
-        return False
+        pass
+    try:
+        os.unlink(tmp_path)
+    except OSError:
+        pass
+    return False
+
+
+def _fast_copy(src: Path, dst: Path) -> None:
+    """复制文件，尽量不搬运数据
+
+    优先创建硬链接（同一文件系统内 O(1)，不读写文件内容）；
+    跨文件系统或不支持硬链接时回退到 shutil.copyfile
+    （Linux 上走 os.sendfile，在内核中完成拷贝）。
+    先链接/复制到同目录临时文件，再 os.replace 覆盖 dst，不会原地改写 dst。
+
+    Args:
+        src: 源文件路径
+        dst: 目标文件路径（已存在时覆盖）
+    """
+    tmp_path = dst.with_name(f".{dst.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        try:
+            os.link(src, tmp_path)
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                raise
+            shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
 
 
 def _save_audio_resource(src: Path, audio_dir: Path, target_basename: str) -> str:
@@ -197,10 +749,23 @@ def _save_audio_resource(src: Path, audio_dir: Path, target_basename: str) -> st
         return f'audio/{case_id}/{target_basename}.mp3'
     else:
         ext = src.suffix
-        shutil.copy2(src, audio_dir / f'{target_basename}{ext}')
+        _fast_copy(src, audio_dir / f'{target_basename}{ext}')
         return f'audio/{case_id}/{target_basename}{ext}'
 
 
+class _RefExtractor(HTMLParser):
+    """单次遍历 HTML，收集 <a href> 与各标签 src 属性中的文件引用"""
+
+    def __init__(self):
+        super().__init__()
+        self.refs: set = set()
+
+    def handle_starttag(self, tag, attrs):
+        for name, value in attrs:
+            if value and (name == 'src' or (name == 'href' and tag == 'a')):
+                self.refs.add(value)
+
+
 def import_remote_session(session_url: str, username: str, password: str, case_id: str) -> dict:
     """从远程 session URL 导入为 case 数据（ASR 异步执行）
 
@@ -226,9 +791,10 @@ def import_remote_session(session_url: str, username: str, password: str, case_i
     html = _download_url(f"{base_url}/", username, password).decode('utf-8')
 
     # 从 <a href="..."> 和 <audio/img src="..."> 中提取文件引用
-    href_files = re.findall(r'<a href="([^"]+)">', html)
-    src_files = re.findall(r'\bsrc="([^"]+)"', html)
-    all_refs = set(href_files + src_files)
+    extractor = _RefExtractor()
+    extractor.feed(html)
+    extractor.close()
+    all_refs = extractor.refs
     files = sorted([f for f in all_refs
                     if not f.startswith(('..', '/', '#', 'http', 'data:'))
                     and '.' in f])
@@ -238,82 +804,115 @@ def import_remote_session(session_url: str, username: str, password: str, case_i
         if known not in files:
             files.append(known)
 
-    print(f"[import] 发现 {len(files)} 个文件: {files}")
+    logger.info(f"[import] 发现 {len(files)} 个文件: {files}")
 
-    audio_dir = RESOURCES_DIR / "audio" / case_id
-    audio_dir.mkdir(parents=True, exist_ok=True)
+    audio_dir = AUDIO_RESOURCES_DIR / case_id
+    _ensure_dir(audio_dir, force=True)
 
     # 手动管理 tmpdir 生命周期（后台 ASR 线程负责清理）
     tmpdir = Path(tempfile.mkdtemp(prefix=f"import_{case_id}_"))
 
     try:
-        # 2. 下载所有文件（跳过 404 等错误）
-        for fname in files:
-            print(f"[import] 下载: {fname}")
-            try:
-                content = _download_url(f"{base_url}/{fname}", username, password)
-                (tmpdir / fname).write_bytes(content)
-            except Exception as e:
-                print(f"[import] 跳过: {fname} ({e})")
+        # 2. 并发下载所有文件（跳过 404 等错误）
+        # 记录已落盘的文件名，后续存在性判断直接查集合，无需逐个 stat
+        downloaded: set = set()
+        with ThreadPoolExecutor(max_workers=_IMPORT_DOWNLOAD_WORKERS) as pool:
+            futures = {}
+            for fname in files:
+                logger.info(f"[import] 下载: {fname}")
+                future = pool.submit(
+                    _download_url_to_file, f"{base_url}/{fname}", username, password, tmpdir / fname
+                )
+                futures[future] = fname
+            for future in as_completed(futures):
+                fname = futures[future]
+                try:
+                    future.result()
+                    downloaded.add(fname)
+                except Exception as e:
+                    logger.warning(f"[import] 跳过: {fname} ({e})")
 
         # 3. 读取 system prompt
         sys_prefix = ''
         sys_suffix = ''
-        if (tmpdir / 'system_prefix.txt').exists():
+        if 'system_prefix.txt' in downloaded:
             sys_prefix = (tmpdir / 'system_prefix.txt').read_text(encoding='utf-8').strip()
-        if (tmpdir / 'system_suffix.txt').exists():
+        if 'system_suffix.txt' in downloaded:
             sys_suffix = (tmpdir / 'system_suffix.txt').read_text(encoding='utf-8').strip()
 
-        # 4. 处理参考音频
-        ref_file = next((f for f in files if f.startswith('system_ref_audio')), None)
-        ref_audio_path = ''
-        if ref_file:
-            ref_audio_path = _save_audio_resource(tmpdir / ref_file, audio_dir, 'ref')
-
-        # 5. 处理对话轮次（不做 ASR，收集待转录列表）
-        turns = []
-        pending_asr: dict = {}  # {turn_idx: user_audio_filename}
-        turn_idx = 0
-        while True:
-            pfx = f'{turn_idx:03d}'
-            user_audio = next((f for f in files if f.startswith(f'{pfx}_user_audio0')), None)
-            asst_txt_name = f'{pfx}_assistant.txt'
-            asst_audio = next((f for f in files if f.startswith(f'{pfx}_assistant_audio0')), None)
-
-            if not user_audio and not asst_audio:
-                break
-
-            # 标记需要 ASR 的 turn
-            user_text = ''
-            if user_audio and (tmpdir / user_audio).exists():
-                pending_asr[turn_idx] = user_audio
-                user_text = '[转录中...]'
-
-            # 读取助手文本（新格式可能未列出 txt，按需下载）
-            asst_text = ''
-            if (tmpdir / asst_txt_name).exists():
-                asst_text = (tmpdir / asst_txt_name).read_text(encoding='utf-8').strip()
-            elif asst_txt_name not in files:
-                try:
-                    txt_content = _download_url(f"{base_url}/{asst_txt_name}", username, password)
-                    (tmpdir / asst_txt_name).write_bytes(txt_content)
-                    asst_text = txt_content.decode('utf-8').strip()
-                except Exception:
-                    pass
-
-            # 处理助手音频
-            asst_audio_path = ''
-            if asst_audio and (tmpdir / asst_audio).exists():
-                asst_audio_path = _save_audio_resource(
-                    tmpdir / asst_audio, audio_dir, f'{pfx}_assistant'
-                )
-
-            turns.append({
-                'user_text': user_text,
-                'assistant_text': asst_text,
-                'assistant_audio': asst_audio_path
-            })
-            turn_idx += 1
+        # ffmpeg 转码为 CPU 密集的独立进程，按 CPU 核数并发
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as audio_pool:
+            # 4. 处理参考音频（音频转码提交到线程池并发执行，结果在步骤 7 收集）
+            ref_file = next((f for f in files if f.startswith('system_ref_audio')), None)
+            ref_future = None
+            if ref_file:
+                ref_future = audio_pool.submit(_save_audio_resource, tmpdir / ref_file, audio_dir, 'ref')
+
+            # 5. 按 turn 前缀（如 "000"）一次性归组音频文件，每轮直接查表
+            #    files 已排序，setdefault 保留每组中排序最靠前的文件
+            turn_files: dict = {}  # {pfx: {"user_audio": name, "asst_audio": name}}
+            for f in files:
+                pfx, sep, rest = f.partition('_')
+                if not sep or not pfx.isdigit():
+                    continue
+                if rest.startswith('user_audio0'):
+                    turn_files.setdefault(pfx, {}).setdefault('user_audio', f)
+                elif rest.startswith('assistant_audio0'):
+                    turn_files.setdefault(pfx, {}).setdefault('asst_audio', f)
+            listed = set(files)  # 页面引用的文件名，每轮 O(1) 判断是否已列出
+
+            # 6. 处理对话轮次（不做 ASR，收集待转录列表）
+            turns = []
+            asst_futures = []  # [(turn, future)]
+            pending_asr: dict = {}  # {turn_idx: user_audio_filename}
+            turn_idx = 0
+            while True:
+                pfx = f'{turn_idx:03d}'
+                turn_entry = turn_files.get(pfx, {})
+                user_audio = turn_entry.get('user_audio')
+                asst_txt_name = f'{pfx}_assistant.txt'
+                asst_audio = turn_entry.get('asst_audio')
+
+                if not user_audio and not asst_audio:
+                    break
+
+                # 标记需要 ASR 的 turn
+                user_text = ''
+                if user_audio and user_audio in downloaded:
+                    pending_asr[turn_idx] = user_audio
+                    user_text = '[转录中...]'
+
+                # 读取助手文本（新格式可能未列出 txt，按需下载）
+                asst_text = ''
+                if asst_txt_name in downloaded:
+                    asst_text = (tmpdir / asst_txt_name).read_text(encoding='utf-8').strip()
+                elif asst_txt_name not in listed:
+                    try:
+                        txt_content = _download_url(f"{base_url}/{asst_txt_name}", username, password)
+                        (tmpdir / asst_txt_name).write_bytes(txt_content)
+                        downloaded.add(asst_txt_name)
+                        asst_text = txt_content.decode('utf-8').strip()
+                    except Exception:
+                        pass
+
+                turn = {
+                    'user_text': user_text,
+                    'assistant_text': asst_text,
+                    'assistant_audio': ''
+                }
+                turns.append(turn)
+
+                # 处理助手音频
+                if asst_audio and asst_audio in downloaded:
+                    asst_futures.append((turn, audio_pool.submit(
+                        _save_audio_resource, tmpdir / asst_audio, audio_dir, f'{pfx}_assistant'
+                    )))
+                turn_idx += 1
+
+            # 7. 等待音频转码完成，回填资源路径
+            ref_audio_path = ref_future.result() if ref_future else ''
+            for turn, future in asst_futures:
+                turn['assistant_audio'] = future.result()
     except Exception:
         shutil.rmtree(tmpdir, ignore_errors=True)
         raise
@@ -325,7 +924,7 @@ def import_remote_session(session_url: str, username: str, password: str, case_i
     else:
         shutil.rmtree(tmpdir, ignore_errors=True)
 
-    print(f"[import] 导入完成: {len(turns)} 轮对话, {len(pending_asr)} 条待转录")
+    logger.info(f"[import] 导入完成: {len(turns)} 轮对话, {len(pending_asr)} 条待转录")
 
     return {
         'id': case_id,
@@ -340,6 +939,34 @@ def import_remote_session(session_url: str, username: str, password: str, case_i
     }
 
 
+def _publish_transcription_status(case_id: str, total: int, results: dict, errors: dict,
+                                 done: bool = False) -> None:
+    """发布 ASR 任务的状态快照
+
+    每次生成新的 dict 整体替换旧快照（单次字典赋值在 CPython 中是原子的），
+    状态查询直接读取当前快照，无需加锁，也不会读到更新到一半的状态。
+    每个快照带递增的 version，发布后唤醒等待中的长轮询请求。
+
+    Args:
+        case_id: case ID
+        total: 待转录总数
+        results: 已完成的转录 {turn_idx: text}（会被复制）
+        errors: 失败的转录 {turn_idx: message}（会被复制）
+        done: 任务是否已结束
+    """
+    with _transcription_cond:
+        previous = _transcription_tasks.get(case_id)
+        _transcription_tasks[case_id] = {
+            "total": total,
+            "completed": len(results) + len(errors),
+            "results": dict(results),
+            "errors": dict(errors),
+            "done": done,
+            "version": previous["version"] + 1 if previous else 1
+        }
+        _transcription_cond.notify_all()
+
+
 def _start_transcription_task(case_id: str, pending_audio: dict, tmpdir: Path) -> None:
     """启动后台 ASR 转录任务
 
@@ -348,14 +975,7 @@ def _start_transcription_task(case_id: str, pending_audio: dict, tmpdir: Path) -
         pending_audio: {turn_idx: user_audio_filename}（文件在 tmpdir 中）
         tmpdir: 临时目录，由后台线程负责清理
     """
-    with _transcription_lock:
-        _transcription_tasks[case_id] = {
-            "total": len(pending_audio),
-            "completed": 0,
-            "results": {},
-            "errors": {},
-            "done": False
-        }
+    _publish_transcription_status(case_id, len(pending_audio), {}, {})
 
     thread = threading.Thread(
         target=_transcription_worker,
@@ -363,44 +983,201 @@ def _start_transcription_task(case_id: str, pending_audio: dict, tmpdir: Path) -
         daemon=True
     )
     thread.start()
-    print(f"[import] 启动后台 ASR: {case_id}, {len(pending_audio)} 条音频")
+    logger.info(f"[import] 启动后台 ASR: {case_id}, {len(pending_audio)} 条音频")
 
 
 def _transcription_worker(case_id: str, pending_audio: dict, tmpdir: Path) -> None:
     """后台 ASR 转录 worker
 
-    逐条转录用户音频，实时更新任务状态，最后清理临时目录。
+    以 ASR_CONCURRENCY 个线程并发转录用户音频（请求以网络等待为主），
+    每完成一条即发布新的状态快照，最后清理临时目录。
     """
+    total = len(pending_audio)
+    results: dict = {}  # {turn_idx(str): text}
+    errors: dict = {}  # {turn_idx(str): error message}
     try:
-        for turn_idx, audio_filename in sorted(pending_audio.items()):
-            audio_path = tmpdir / audio_filename
-            print(f"[asr-{case_id}] 转录 turn {turn_idx}: {audio_filename}")
-            try:
-                text = _transcribe_audio(audio_path)
-                print(f"[asr-{case_id}] turn {turn_idx} 完成: {text[:80]}")
-                with _transcription_lock:
-                    task = _transcription_tasks[case_id]
-                    task["results"][str(turn_idx)] = text
-                    task["completed"] += 1
-            except Exception as e:
-                print(f"[asr-{case_id}] turn {turn_idx} 失败: {e}")
-                with _transcription_lock:
-                    task = _transcription_tasks[case_id]
-                    task["errors"][str(turn_idx)] = str(e)
-                    task["completed"] += 1
+        with ThreadPoolExecutor(max_workers=ASR_CONCURRENCY,
+                                thread_name_prefix=f"asr-{case_id}") as pool:
+            futures = {}
+            for turn_idx, audio_filename in sorted(pending_audio.items()):
+                logger.info(f"[asr-{case_id}] 转录 turn {turn_idx}: {audio_filename}")
+                futures[pool.submit(_transcribe_audio, tmpdir / audio_filename)] = turn_idx
+
+            for future in as_completed(futures):
+                turn_idx = futures[future]
+                try:
+                    text = future.result()
+                    logger.info(f"[asr-{case_id}] turn {turn_idx} 完成: {text[:80]}")
+                    results[str(turn_idx)] = text
+                except Exception as e:
+                    logger.warning(f"[asr-{case_id}] turn {turn_idx} 失败: {e}")
+                    errors[str(turn_idx)] = str(e)
+                _publish_transcription_status(case_id, total, results, errors)
     finally:
-        with _transcription_lock:
-            _transcription_tasks[case_id]["done"] = True
+        _publish_transcription_status(case_id, total, results, errors, done=True)
         shutil.rmtree(tmpdir, ignore_errors=True)
-        print(f"[asr-{case_id}] 任务结束，临时目录已清理")
+        logger.info(f"[asr-{case_id}] 任务结束，临时目录已清理")
+
+
+def _start_build() -> str:
+    """启动后台构建任务
+
+    同一时间只运行一个构建；已有构建在运行时直接返回其任务 ID。
+
+    Returns:
+        构建任务 ID
+    """
+    with _build_lock:
+        for job_id, job in _build_jobs.items():
+            if job["status"] == "running":
+                return job_id
+
+        # 清理过旧的任务记录
+        while len(_build_jobs) >= _BUILD_JOBS_KEEP:
+            del _build_jobs[next(iter(_build_jobs))]
+
+        proc = subprocess.Popen(
+            [sys.executable, _BUILD_SCRIPT_STR],
+            cwd=_REPO_ROOT_STR,
+            # 管道输出默认块缓冲，关闭缓冲以便日志逐行实时推送
+            env={**os.environ, "PYTHONUNBUFFERED": "1"},
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding='utf-8',
+            errors='replace'
+        )
+        job_id = uuid.uuid4().hex
+        job = {
+            "status": "running",
+            "returncode": None,
+            "log": deque(maxlen=_BUILD_LOG_MAX_LINES),
+            "lines": 0  # 累计输出行数（含已被环形缓冲挤出的行）
+        }
+        _build_jobs[job_id] = job
+
+    thread = threading.Thread(target=_build_worker, args=(job_id, job, proc), daemon=True)
+    thread.start()
+    logger.info(f"[build-{job_id[:8]}] 开始构建...")
+    return job_id
+
+
+def _build_worker(job_id: str, job: dict, proc: subprocess.Popen) -> None:
+    """后台构建 worker
+
+    逐行收集构建输出（环形缓冲，内存有上限），结束后更新任务状态。
+    每行输出和任务结束都会唤醒等待中的日志流。
+    读取输出出错时终止构建进程并标记为失败，任务不会一直停留在 running
+    （否则 _start_build 会一直返回这个已失效的任务）。
+
+    Args:
+        job_id: 构建任务 ID
+        job: _build_jobs 中该任务的状态 dict
+        proc: 构建进程
+    """
+    log = job["log"]
+    returncode = None
+    try:
+        for line in proc.stdout:
+            with _build_cond:
+                log.append(line)
+                job["lines"] += 1
+                _build_cond.notify_all()
+        returncode = proc.wait()
+    except Exception:
+        logger.exception(f"[build-{job_id[:8]}] 读取构建输出出错")
+        proc.kill()
+        returncode = proc.wait()
+    finally:
+        with _build_cond:
+            job["returncode"] = returncode
+            job["status"] = "success" if returncode == 0 else "error"
+            _build_cond.notify_all()
+
+    if returncode == 0:
+        logger.info(f"[build-{job_id[:8]}] 构建成功")
+    else:
+        logger.warning(f"[build-{job_id[:8]}] 构建失败: returncode={returncode}")
+
+
+def _dir_has_file(dir_path: str, name: str) -> bool:
+    """目录下是否存在名为 name 的普通文件
+
+    按目录 mtime 缓存目录内的文件名集合：增删、替换文件都会更新目录 mtime，
+    命中缓存时每次查询只需 stat 目录本身一次。
+    目录 mtime 以时钟 tick 为粒度，与缓存同一 tick 内增删的文件不会改变 mtime：
+    缓存未命中时回退到 os.path.isfile 确认；命中但文件已被删除的情况由调用方
+    在打开文件失败时调用 _forget_dir_listing 处理。
+
+    Args:
+        dir_path: 目录路径
+        name: 文件名
+
+    Returns:
+        是否存在该文件
+    """
+    try:
+        mtime_ns = os.stat(dir_path).st_mtime_ns
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+
+    with _dir_listing_lock:
+        cached = _dir_listing_cache.get(dir_path)
+    if cached is None or cached[0] != mtime_ns:
+        try:
+            with os.scandir(dir_path) as it:
+                names = frozenset(entry.name for entry in it if entry.is_file())
+        except OSError:
+            return False
+        cached = (mtime_ns, names)
+        with _dir_listing_lock:
+            _dir_listing_cache[dir_path] = cached
+    if name in cached[1]:
+        return True
+    return os.path.isfile(os.path.join(dir_path, name))
+
+
+def _forget_dir_listing(dir_path: str) -> None:
+    """丢弃目录的缓存列表（命中缓存但文件实际已被删除时调用）"""
+    with _dir_listing_lock:
+        _dir_listing_cache.pop(dir_path, None)
+
+
+@functools.lru_cache(maxsize=256)
+def _content_type_for_ext(ext: str) -> str:
+    """按扩展名（小写，含点）返回 Content-Type，结果缓存
+
+    常见音频扩展名直接查 _AUDIO_MIME，其余查询一次 mimetypes 后缓存。
+    """
+    return (
+        _AUDIO_MIME.get(ext)
+        or mimetypes.guess_type('file' + ext)[0]
+        or 'application/octet-stream'
+    )
+
+
+def _has_fileno(f) -> bool:
+    """文件对象是否对应真实的文件描述符（可用于 sendfile）"""
+    try:
+        f.fileno()
+    except (AttributeError, OSError):
+        return False
+    return True
 
 
 class EditorHandler(SimpleHTTPRequestHandler):
-    """自定义 HTTP 处理器"""
+    """自定义 HTTP 处理器
+    
+    使用 HTTP/1.1 长连接：所有响应都带 Content-Length（或显式 Connection: close），
+    浏览器可复用同一连接发送连续的轮询 / 音频请求，无需每次重新握手。
+    """
+    protocol_version = "HTTP/1.1"
+    # 空闲长连接的读超时（秒），超时后关闭连接，释放线程池中的 worker
+    timeout = 30
     
     def __init__(self, *args, **kwargs):
         # 设置服务根目录为项目根目录
-        super().__init__(*args, directory=str(REPO_ROOT), **kwargs)
+        super().__init__(*args, directory=_REPO_ROOT_STR, **kwargs)
     
     def do_GET(self):
         """处理 GET 请求"""
@@ -413,35 +1190,59 @@ class EditorHandler(SimpleHTTPRequestHandler):
             self._handle_get_data()
         elif clean_path == '/api/transcription-status':
             self._handle_transcription_status()
+        elif clean_path.startswith('/api/build/') and clean_path.endswith('/log'):
+            self._handle_build_log(clean_path[len('/api/build/'):-len('/log')])
+        elif clean_path.startswith('/api/build/'):
+            self._handle_build_status(clean_path[len('/api/build/'):])
         # 音频请求：优先从 resources 提供（热更新）
         elif clean_path.startswith('/minicpm-o-4_5/audio/'):
             self._serve_audio(clean_path)
         else:
-            # 静态文件服务
-            super().do_GET()
+            # 静态文件服务（文本资源优先返回 gzip 压缩版本）
+            if not self._serve_static_gzip():
+                super().do_GET()
     
     def do_POST(self):
         """处理 POST 请求"""
-        if self.path == '/api/data':
+        clean_path = urlparse(self.path).path
+        if clean_path == '/api/data':
             self._handle_save_data()
-        elif self.path == '/api/build':
+        elif clean_path == '/api/build':
             self._handle_build()
-        elif self.path == '/api/upload':
+        elif clean_path == '/api/upload':
             self._handle_upload()
-        elif self.path == '/api/import-session':
+        elif clean_path == '/api/import-session':
             self._handle_import_session()
         else:
             self.send_error(404, "Not Found")
     
     def do_HEAD(self):
         """处理 HEAD 请求"""
-        if self.path.startswith('/api/'):
+        clean_path = urlparse(self.path).path
+        if clean_path == '/api/data':
+            self._handle_head_data()
+        elif clean_path.startswith('/api/'):
             self.send_response(200)
             self.send_header('Content-type', 'application/json')
+            self.send_header('Content-Length', '0')
             self.end_headers()
         else:
             super().do_HEAD()
     
+    def copyfile(self, source, outputfile):
+        """文件发送：普通文件走 socket.sendfile（os.sendfile 零拷贝），
+        其他来源（如目录列表的 BytesIO）按 64 KiB 分块复制，内存占用与文件大小无关
+        """
+        try:
+            if outputfile is self.wfile and hasattr(os, 'sendfile') and _has_fileno(source):
+                self.connection.sendfile(source)
+            else:
+                shutil.copyfileobj(source, outputfile, _COPY_CHUNK_SIZE)
+        except (BrokenPipeError, ConnectionResetError, TimeoutError):
+            # 客户端提前断开（如音频拖动进度条、切换页面）或长时间不读取
+            # （如暂停的音频元素，超过 timeout 秒），无需报错，关闭连接即可
+            self.close_connection = True
+    
     def _serve_audio(self, request_path):
         """优先从 resources 提供音频文件（热更新支持）
         
@@ -450,207 +1251,537 @@ class EditorHandler(SimpleHTTPRequestHandler):
         优先级 2: minicpm-o-4_5/audio/case_id/file.mp3 (已构建的)
         """
         # 提取相对路径: audio/case_id/file.mp3
-        relative_path = request_path.replace('/minicpm-o-4_5/', '', 1)
-        
-        # 优先从 resources 提供
-        resource_file = RESOURCES_DIR / relative_path
-        if resource_file.exists() and resource_file.is_file():
-            self._send_file(resource_file)
+        relative_path = os.path.normpath(request_path.replace('/minicpm-o-4_5/', '', 1))
+        # 安全检查：规范化后仍以 .. 开头说明试图跳出 audio 根目录
+        if relative_path.startswith('..') or os.path.isabs(relative_path):
+            self.send_error(404, "Audio file not found")
             return
+        relative_dir, name = os.path.split(relative_path)
         
-        # 回退到已构建的文件
-        built_file = REPO_ROOT / "minicpm-o-4_5" / relative_path
-        if built_file.exists() and built_file.is_file():
-            self._send_file(built_file)
-            return
+        # 优先从 resources 提供，其次回退到已构建的文件；
+        # 缓存认为存在但打开时已被删除，则丢弃该目录缓存并继续回退
+        for base_dir in (_RESOURCES_PREFIX + relative_dir, _OUTPUT_PREFIX + relative_dir):
+            if _dir_has_file(base_dir, name):
+                if self._send_file(base_dir + os.sep + name):
+                    return
+                _forget_dir_listing(base_dir)
         
         self.send_error(404, f"Audio file not found: {relative_path}")
     
+    def _serve_static_gzip(self):
+        """以 gzip 压缩提供静态文本资源（html/js/css 等）
+        
+        仅在客户端接受 gzip 且文件足够大时处理；压缩结果按 mtime 缓存在内存中，
+        文件修改后自动重新压缩。其余情况交给 SimpleHTTPRequestHandler。
+        
+        Returns:
+            是否已发送响应
+        """
+        if not self._accepts_encoding('gzip'):
+            return False
+        
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            # 与 SimpleHTTPRequestHandler 一致：目录请求提供 index.html
+            if not self.path.split('?', 1)[0].endswith('/'):
+                return False
+            path = os.path.join(path, 'index.html')
+        if os.path.splitext(path)[1].lower() not in _GZIP_STATIC_SUFFIXES:
+            return False
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if st.st_size <= GZIP_MIN_BYTES:
+            return False
+        
+        try:
+            entry = _load_static_gzip(path, st)
+        except OSError:
+            return False
+        
+        etag = entry["etag"]
+        if self._etag_matches(etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return True
+        
+        body = entry["gzip_body"]
+        self.send_response(200)
+        self.send_header('Content-type', self.guess_type(path))
+        self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', self.date_time_string(st.st_mtime))
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+        return True
+    
     def _send_file(self, file_path):
-        """发送文件响应"""
-        content_type, _ = mimetypes.guess_type(str(file_path))
-        if not content_type:
-            content_type = 'application/octet-stream'
+        """发送文件响应
+        
+        Content-Length 取自 fstat，文件内容经 copyfile（socket.sendfile → os.sendfile）
+        由内核直接写入 socket，不把整个文件读入内存。
+        附带由 (mtime, size) 生成的 ETag，浏览器重新验证时文件未变则返回 304。
+        
+        Returns:
+            文件不存在时返回 False（未发送任何响应，由调用方回退）；否则 True
+        """
+        content_type = _content_type_for_ext(os.path.splitext(file_path)[1].lower())
         
         try:
-            with open(file_path, 'rb') as f:
-                data = f.read()
+            f = open(file_path, 'rb')
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            self.send_error(500, f"Error reading file: {e}")
+            return True
+        
+        with f:
+            st = os.fstat(f.fileno())
+            etag = _make_etag(st)
+            if self._etag_matches(etag):
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', 'no-cache, must-revalidate')
+                self.end_headers()
+                return True
             
             self.send_response(200)
             self.send_header('Content-type', content_type)
-            self.send_header('Content-Length', str(len(data)))
-            self.send_header('Cache-Control', 'no-cache')  # 热更新不缓存
+            self.send_header('Content-Length', str(st.st_size))
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', self.date_time_string(st.st_mtime))
+            # 热更新：每次使用前都需重新验证
+            self.send_header('Cache-Control', 'no-cache, must-revalidate')
             self.end_headers()
-            self.wfile.write(data)
-        except Exception as e:
-            self.send_error(500, f"Error reading file: {e}")
+            self.copyfile(f, self.wfile)
+        return True
+    
+    def _etag_matches(self, etag):
+        """请求的 If-None-Match 是否命中当前 ETag"""
+        if_none_match = self.headers.get('If-None-Match')
+        if not if_none_match:
+            return False
+        candidates = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in candidates or etag in candidates
+    
+    def _accepts_encoding(self, coding):
+        """客户端的 Accept-Encoding 是否接受指定编码（q=0 视为不接受）"""
+        for item in self.headers.get('Accept-Encoding', '').split(','):
+            name, _, params = item.partition(';')
+            if name.strip().lower() != coding:
+                continue
+            params = params.replace(' ', '')
+            if params.startswith('q='):
+                try:
+                    return float(params[2:]) > 0
+                except ValueError:
+                    return True
+            return True
+        return False
+    
+    def _encode_data_body(self, entry):
+        """按 Accept-Encoding 选择 /api/data 响应体：优先 br，其次 gzip，最后原始 JSON
+        
+        Returns:
+            (body, content_encoding)，未压缩时 content_encoding 为 None
+        """
+        if entry["br_body"] is not None and self._accepts_encoding('br'):
+            return entry["br_body"], 'br'
+        if entry["gzip_body"] is not None and self._accepts_encoding('gzip'):
+            return entry["gzip_body"], 'gzip'
+        return entry["body"], None
+    
+    def _content_length(self, max_bytes=MAX_BODY_BYTES):
+        """解析并校验 Content-Length
+        
+        Args:
+            max_bytes: 允许的最大请求体长度
+        
+        Returns:
+            请求体长度；缺失、非法或超过 max_bytes 时返回 None（已发送错误响应）
+        """
+        try:
+            content_length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            self.send_error(411, "Content-Length required")
+            return None
+        if content_length < 0:
+            self.send_error(400, "Invalid Content-Length")
+            return None
+        if content_length > max_bytes:
+            self.send_error(413, f"Request body too large (limit {max_bytes} bytes)")
+            return None
+        return content_length
+    
+    def _read_body(self, max_bytes=MAX_BODY_BYTES):
+        """读取请求体
+        
+        按 Content-Length 分块读取，超过 max_bytes 的请求直接拒绝，
+        不会因为异常的 Content-Length 一次性分配巨大内存。
+        
+        Args:
+            max_bytes: 允许的最大请求体长度（各接口按用途传入）
+        
+        Returns:
+            请求体 bytearray；出错时返回 None（已发送错误响应）
+        """
+        content_length = self._content_length(max_bytes)
+        if content_length is None:
+            return None
+        
+        # 长度已受 max_bytes 限制，可按 Content-Length 预分配后 readinto 原地填充，
+        # 避免逐块生成 bytes 再拼接
+        body = bytearray(content_length)
+        with memoryview(body) as view:
+            pos = 0
+            while pos < content_length:
+                n = self.rfile.readinto(view[pos:pos + _READ_CHUNK_SIZE])
+                if not n:
+                    self.send_error(400, "Incomplete request body")
+                    return None
+                pos += n
+        return body
+    
+    def _send_json(self, data, status=200):
+        """发送 JSON 响应
+        
+        经 _json_dumps 一次性编码为紧凑 bytes（优先 orjson），
+        并始终带 Content-Length，便于客户端复用连接。
+        """
+        body = _json_dumps(data)
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
     
     def _handle_get_data(self):
         """获取数据"""
-        config_path = CONFIG_DIR / "data.json"
+        data_path, label, st = _resolve_data_path()
+        if not data_path:
+            self.send_error(404, "No data file found")
+            return
+        logger.info(f"[GET /api/data] 从{label}加载: {data_path}")
+        
+        try:
+            entry = _load_json_cached(data_path, st)
+        except ValueError as e:
+            self.send_error(500, str(e))
+            return
+        
+        etag = entry["etag"]
+        if self._etag_matches(etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            return
         
-        if config_path.exists():
-            # 从编辑器配置加载
-            print(f"[GET /api/data] 从编辑器配置加载: {config_path}")
-            with open(config_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+        # ?pretty=1 时返回带缩进的 JSON（便于调试），默认返回紧凑格式
+        params = parse_qs(urlparse(self.path).query)
+        if params.get('pretty', [''])[0] == '1':
+            body, encoding = _json_dumps(entry["data"], indent=True), None
         else:
-            # 回退到 data.js
-            demo_data_path = REPO_ROOT / "minicpm-o-4_5" / "data.js"
-            if demo_data_path.exists():
-                print(f"[GET /api/data] 从 data.js 加载: {demo_data_path}")
-                with open(demo_data_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    # 提取 JSON 部分
-                    match = re.search(r"const DEMO_DATA = (\{.*\});", content, re.DOTALL)
-                    if match:
-                        data = json.loads(match.group(1))
-                    else:
-                        self.send_error(500, "Could not parse data.js")
-                        return
-            else:
-                # 回退到 cases.json
-                cases_path = SCRIPT_DIR.parent / "minicpm-o-4_5" / "config" / "cases.json"
-                if cases_path.exists():
-                    print(f"[GET /api/data] 从 cases.json 加载: {cases_path}")
-                    with open(cases_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                else:
-                    self.send_error(404, "No data file found")
-                    return
+            body, encoding = self._encode_data_body(entry)
         
         self.send_response(200)
         self.send_header('Content-type', 'application/json')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', self.date_time_string(entry["mtime_ns"] / 1e9))
+        self.send_header('Cache-Control', 'no-cache')  # 每次都带 If-None-Match 重新验证
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _handle_head_data(self):
+        """HEAD /api/data：只返回 ETag / Last-Modified / Content-Length
+        
+        只 stat 数据文件，不读取解析；缓存命中时附带响应体长度，
+        客户端可据此判断数据是否变化，而无需发起完整 GET。
+        """
+        data_path, _, st = _resolve_data_path()
+        if not data_path:
+            self.send_error(404, "No data file found")
+            return
+        
+        etag = _make_etag(st)
+        with _data_cache_lock:
+            entry = _data_cache.get(data_path)
+        
+        self.send_response(304 if self._etag_matches(etag) else 200)
+        self.send_header('Content-type', 'application/json')
+        if entry and entry["etag"] == etag:
+            body, encoding = self._encode_data_body(entry)
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+            self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', self.date_time_string(st.st_mtime))
+        self.send_header('Cache-Control', 'no-cache')
         self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
-        self.wfile.write(json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'))
     
     def _handle_save_data(self):
         """保存数据"""
-        content_length = int(self.headers['Content-Length'])
-        post_data = self.rfile.read(content_length)
+        post_data = self._read_body(MAX_JSON_BODY_BYTES)
+        if post_data is None:
+            return
         
         try:
-            data = json.loads(post_data.decode('utf-8'))
-            file_path = CONFIG_DIR / "data.json"
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            data = _json_loads(post_data)
+            file_path = DATA_FILE
+            content = _json_dumps(data, indent=True)
+            with _save_lock:
+                _atomic_write_bytes(file_path, content)
+                # 用本次解析结果预热缓存，下一次 GET 无需重新读盘解析
+                _cache_data(file_path, file_path.stat(), data)
             
-            print(f"[POST /api/data] 保存成功: {file_path}")
+            logger.info(f"[POST /api/data] 保存成功: {file_path}")
             
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({
+            self._send_json({
                 "status": "success",
                 "message": "Data saved successfully"
-            }).encode('utf-8'))
+            })
             
         except json.JSONDecodeError as e:
-            print(f"[POST /api/data] JSON 解析错误: {e}")
+            logger.error(f"[POST /api/data] JSON 解析错误: {e}")
             self.send_error(400, f"Invalid JSON: {e}")
         except Exception as e:
-            print(f"[POST /api/data] 保存错误: {e}")
+            logger.error(f"[POST /api/data] 保存错误: {e}")
             self.send_error(500, f"Server error: {e}")
     
     def _handle_upload(self):
         """处理音频文件上传
         
-        请求格式 (JSON):
-        {
-            "path": "audio/case_id/ref.mp3",
-            "data": "<base64 encoded file content>"
-        }
+        支持两种请求格式：
+        1. 原始二进制（编辑器使用）：
+           POST /api/upload?path=audio/case_id/ref.mp3
+           Content-Type: application/octet-stream，请求体即文件内容，边读边写入磁盘
+        2. JSON（兼容旧格式）：
+           {
+               "path": "audio/case_id/ref.mp3",
+               "data": "<base64 encoded file content>"
+           }
+           base64 直接从请求体中切片、分块解码后写入，不生成 str 或完整的解码副本
         
         文件保存到: develop/edit_tool/resources/audio/case_id/ref.mp3
         """
-        content_length = int(self.headers['Content-Length'])
-        post_data = self.rfile.read(content_length)
+        if self.headers.get_content_type() == 'application/octet-stream':
+            self._handle_upload_raw()
+            return
+        
+        post_data = self._read_body()
+        if post_data is None:
+            return
         
         try:
-            payload = json.loads(post_data.decode('utf-8'))
+            payload, file_data_b64 = _split_upload_payload(post_data)
             
             file_path = payload.get('path', '')
-            file_data_b64 = payload.get('data', '')
             
             if not file_path or not file_data_b64:
                 self.send_error(400, "Missing 'path' or 'data' field")
                 return
             
-            # 安全检查：防止路径遍历
-            if '..' in file_path or file_path.startswith('/'):
-                self.send_error(400, "Invalid file path")
+            save_path = self._upload_target(file_path)
+            if save_path is None:
                 return
             
-            # 解码文件内容
-            file_bytes = base64.b64decode(file_data_b64)
-            
-            # 保存到 resources 目录
-            save_path = RESOURCES_DIR / file_path
-            save_path.parent.mkdir(parents=True, exist_ok=True)
-            save_path.write_bytes(file_bytes)
+            # 分块解码并保存到 resources 目录
+            _ensure_dir(save_path.parent)
+            with _atomic_open(save_path) as out:
+                size = _decode_base64_to(file_data_b64, out)
             
-            file_size_kb = len(file_bytes) / 1024
-            print(f"[POST /api/upload] 上传成功: {save_path} ({file_size_kb:.1f} KB)")
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({
-                "status": "success",
-                "message": f"File uploaded: {file_path}",
-                "path": file_path,
-                "size": len(file_bytes)
-            }).encode('utf-8'))
+            self._send_upload_result(file_path, save_path, size)
             
         except base64.binascii.Error as e:
-            print(f"[POST /api/upload] Base64 解码错误: {e}")
+            logger.error(f"[POST /api/upload] Base64 解码错误: {e}")
             self.send_error(400, f"Invalid base64 data: {e}")
         except json.JSONDecodeError as e:
-            print(f"[POST /api/upload] JSON 解析错误: {e}")
+            logger.error(f"[POST /api/upload] JSON 解析错误: {e}")
             self.send_error(400, f"Invalid JSON: {e}")
         except Exception as e:
-            print(f"[POST /api/upload] 上传错误: {e}")
+            logger.error(f"[POST /api/upload] 上传错误: {e}")
             self.send_error(500, f"Upload error: {e}")
     
+    def _handle_upload_raw(self):
+        """处理原始二进制上传：按块从 socket 读取并直接写入目标文件"""
+        params = parse_qs(urlparse(self.path).query)
+        file_path = params.get('path', [''])[0]
+        if not file_path:
+            self.send_error(400, "Missing 'path' parameter")
+            return
+        
+        save_path = self._upload_target(file_path)
+        if save_path is None:
+            return
+        
+        content_length = self._content_length()
+        if content_length is None:
+            return
+        if content_length == 0:
+            self.send_error(400, "Empty file")
+            return
+        
+        try:
+            _ensure_dir(save_path.parent)
+            with _atomic_open(save_path) as out:
+                remaining = content_length
+                while remaining:
+                    chunk = self.rfile.read(min(_READ_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise ConnectionError("Incomplete request body")
+                    out.write(chunk)
+                    remaining -= len(chunk)
+        except ConnectionError as e:
+            logger.warning(f"[POST /api/upload] 上传中断: {e}")
+            self.close_connection = True
+            return
+        except Exception as e:
+            logger.error(f"[POST /api/upload] 上传错误: {e}")
+            self.send_error(500, f"Upload error: {e}")
+            return
+        
+        self._send_upload_result(file_path, save_path, content_length)
+    
+    def _upload_target(self, file_path):
+        """校验上传路径并返回保存位置
+        
+        Returns:
+            resources 目录下的目标 Path；路径非法时返回 None（已发送错误响应）
+        """
+        # 安全检查：解析后的路径必须位于 resources 目录内（防止 ../、绝对路径及符号链接逃逸）
+        save_path = (RESOURCES_DIR / file_path).resolve()
+        try:
+            save_path.relative_to(_RESOURCES_ROOT)
+        except ValueError:
+            save_path = None
+        if save_path is None or save_path == _RESOURCES_ROOT:
+            self.send_error(400, "Invalid file path")
+            return None
+        return save_path
+    
+    def _send_upload_result(self, file_path, save_path, size):
+        """上传成功的日志与响应"""
+        logger.info(f"[POST /api/upload] 上传成功: {save_path} ({size / 1024:.1f} KB)")
+        self._send_json({
+            "status": "success",
+            "message": f"File uploaded: {file_path}",
+            "path": file_path,
+            "size": size
+        })
+    
     def _handle_build(self):
-        """触发构建"""
+        """触发构建（后台执行，立即返回任务 ID）
+        
+        POST /api/build
+        返回: {"status": "running", "job_id": "..."}，
+        之后通过 GET /api/build/{job_id} 轮询结果
+        """
+        # 本接口不读取请求体；若客户端附带了请求体，响应后关闭连接，
+        # 避免未读的数据被当作下一个请求解析
+        if self.headers.get('Content-Length', '0') != '0':
+            self.close_connection = True
+        
         try:
-            print(f"[POST /api/build] 开始构建...")
-            result = subprocess.run(
-                ['python3', str(BUILD_SCRIPT)],
-                cwd=str(REPO_ROOT),
-                capture_output=True,
-                text=True
-            )
-            
-            if result.returncode == 0:
-                print(f"[POST /api/build] 构建成功")
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                self.wfile.write(json.dumps({
-                    "status": "success",
-                    "message": "Build completed",
-                    "output": result.stdout
-                }).encode('utf-8'))
-            else:
-                print(f"[POST /api/build] 构建失败: {result.stderr}")
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                self.wfile.write(json.dumps({
-                    "status": "error",
-                    "message": "Build failed",
-                    "error": result.stderr,
-                    "output": result.stdout
-                }).encode('utf-8'))
-                
+            job_id = _start_build()
+            self._send_json({
+                "status": "running",
+                "job_id": job_id
+            }, status=202)
         except Exception as e:
-            print(f"[POST /api/build] 构建错误: {e}")
+            logger.error(f"[POST /api/build] 构建错误: {e}")
             self.send_error(500, f"Build error: {e}")
     
+    def _handle_build_status(self, job_id):
+        """查询后台构建状态
+        
+        GET /api/build/{job_id}
+        返回: {"status": "running" | "success" | "error", "returncode", "output"}
+        """
+        with _build_lock:
+            job = _build_jobs.get(job_id)
+            if job:
+                status = job["status"]
+                returncode = job["returncode"]
+                output = ''.join(job["log"])
+        
+        if not job:
+            self._send_json({
+                "status": "not_found",
+                "job_id": job_id
+            }, status=404)
+            return
+        
+        response = {
+            "status": status,
+            "job_id": job_id,
+            "returncode": returncode,
+            "output": output
+        }
+        if status == "success":
+            response["message"] = "Build completed"
+        elif status == "error":
+            response["message"] = "Build failed"
+            response["error"] = output
+        self._send_json(response)
+    
+    def _handle_build_log(self, job_id):
+        """流式输出构建日志
+        
+        GET /api/build/{job_id}/log
+        以 text/plain 持续推送构建输出（先补发已有日志，再逐行推送新输出），
+        构建结束后关闭连接（响应无 Content-Length，以 Connection: close 标记结束）。
+        """
+        with _build_lock:
+            job = _build_jobs.get(job_id)
+        
+        if not job:
+            self._send_json({
+                "status": "not_found",
+                "job_id": job_id
+            }, status=404)
+            return
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        
+        sent = 0  # 已推送的累计行数
+        try:
+            while True:
+                with _build_cond:
+                    while job["lines"] == sent and job["status"] == "running":
+                        _build_cond.wait()
+                    log = job["log"]
+                    # 环形缓冲中最早一行的序号；被挤出的旧行直接跳过
+                    first = job["lines"] - len(log)
+                    lines = list(itertools.islice(log, max(sent - first, 0), None))
+                    sent = job["lines"]
+                    done = job["status"] != "running"
+                if lines:
+                    self.wfile.write(''.join(lines).encode('utf-8'))
+                if done:
+                    break
+        except (BrokenPipeError, ConnectionResetError, TimeoutError):
+            pass
+
     def _handle_import_session(self):
         """处理远程 session 导入请求
 
@@ -662,11 +1793,12 @@ class EditorHandler(SimpleHTTPRequestHandler):
             "case_id": "english_conv_004"
         }
         """
-        content_length = int(self.headers['Content-Length'])
-        post_data = self.rfile.read(content_length)
+        post_data = self._read_body(MAX_JSON_BODY_BYTES)
+        if post_data is None:
+            return
 
         try:
-            payload = json.loads(post_data.decode('utf-8'))
+            payload = _json_loads(post_data)
             url = payload.get('url', '')
             username = payload.get('username', '')
             password = payload.get('password', '')
@@ -676,35 +1808,32 @@ class EditorHandler(SimpleHTTPRequestHandler):
                 self.send_error(400, "Missing 'url' or 'case_id'")
                 return
 
-            print(f"[POST /api/import-session] 导入: {url} → {case_id}")
+            logger.info(f"[POST /api/import-session] 导入: {url} → {case_id}")
             case_data = import_remote_session(url, username, password, case_id)
             has_pending_asr = case_data.pop('_has_pending_asr', False)
 
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({
+            self._send_json({
                 "status": "success",
                 "case": case_data,
                 "has_pending_asr": has_pending_asr
-            }, ensure_ascii=False).encode('utf-8'))
+            })
 
         except Exception as e:
-            print(f"[POST /api/import-session] 错误: {e}")
-            traceback.print_exc()
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({
+            logger.exception(f"[POST /api/import-session] 错误: {e}")
+            self._send_json({
                 "status": "error",
                 "message": str(e)
-            }, ensure_ascii=False).encode('utf-8'))
+            }, status=500)
 
     def _handle_transcription_status(self):
         """查询后台 ASR 转录状态
 
-        GET /api/transcription-status?case_id=xxx
-        返回: {"total", "completed", "results": {idx: text}, "errors": {idx: msg}, "done": bool}
+        GET /api/transcription-status?case_id=xxx[&since=<version>]
+        返回: {"total", "completed", "results": {idx: text}, "errors": {idx: msg}, "done": bool,
+              "version": int}
+
+        带 since 时为长轮询：若当前快照的 version 仍等于 since 且任务未结束，
+        最多等待 _TRANSCRIPTION_POLL_TIMEOUT 秒，直到有新的转录进度。
         """
         parsed = urlparse(self.path)
         params = parse_qs(parsed.query)
@@ -714,52 +1843,115 @@ class EditorHandler(SimpleHTTPRequestHandler):
             self.send_error(400, "Missing 'case_id' parameter")
             return
 
-        with _transcription_lock:
-            task = _transcription_tasks.get(case_id)
+        since = params.get('since', [''])[0]
+        if since:
+            try:
+                since = int(since)
+            except ValueError:
+                self.send_error(400, "Invalid 'since' parameter")
+                return
+
+        # 快照只读且整体替换，直接读取即可，无需加锁
+        task = _transcription_tasks.get(case_id)
+
+        if task and since and task["version"] == since and not task["done"]:
+            with _transcription_cond:
+                _transcription_cond.wait_for(
+                    lambda: _transcription_tasks[case_id]["version"] != since,
+                    timeout=_TRANSCRIPTION_POLL_TIMEOUT
+                )
+                task = _transcription_tasks[case_id]
 
         if not task:
-            self.send_response(404)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({
+            self._send_json({
                 "status": "not_found",
                 "case_id": case_id
-            }).encode('utf-8'))
+            }, status=404)
             return
 
-        with _transcription_lock:
-            response = {
-                "status": "ok",
-                "case_id": case_id,
-                "total": task["total"],
-                "completed": task["completed"],
-                "results": dict(task["results"]),
-                "errors": dict(task["errors"]),
-                "done": task["done"]
-            }
-
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.end_headers()
-        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+        self._send_json({
+            "status": "ok",
+            "case_id": case_id,
+            **task
+        })
 
     def log_message(self, format, *args):
         """自定义日志格式"""
-        print(f"[{self.log_date_time_string()}] {args[0]}")
+        logger.info("[%s] %s", self.log_date_time_string(), args[0])
+
+
+class PooledHTTPServer(HTTPServer):
+    """线程池 HTTP Server，支持并发请求（ASR 轮询不会被阻塞）
+    
+    accept 到的连接放入队列，由固定数量（max_workers）的 worker 线程取出处理，
+    线程复用，大量并发连接（如批量音频预览、轮询）只会在队列中排队，
+    不会无限制地创建新线程。worker 为守护线程：Ctrl+C 退出时不必等待
+    空闲长连接、长轮询或构建日志流结束。
+    """
+    max_workers = 32
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._requests = queue.SimpleQueue()  # (request, client_address)；None 表示退出
+        for i in range(self.max_workers):
+            threading.Thread(target=self._worker, name=f'http-{i}', daemon=True).start()
+    
+    def process_request(self, request, client_address):
+        self._requests.put((request, client_address))
+    
+    def _worker(self):
+        """worker 线程：循环取出连接并处理（与 ThreadingMixIn.process_request_thread 相同）"""
+        while True:
+            item = self._requests.get()
+            if item is None:
+                return
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+    
+    def server_close(self):
+        super().server_close()
+        for _ in range(self.max_workers):
+            self._requests.put(None)
 
 
-class ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
-    """多线程 HTTP Server，支持并发请求（ASR 轮询不会被阻塞）"""
-    daemon_threads = True
+def _setup_logging(level: int) -> logging.handlers.QueueListener:
+    """配置日志：请求线程经 QueueHandler 入队（O(1)，不争用 stdout），
+    后台 QueueListener 线程负责格式化并输出到 stdout
+
+    Args:
+        level: 日志级别
+
+    Returns:
+        已启动的 QueueListener（退出时调用 stop() 输出剩余日志）
+    """
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(level)
+    logger.propagate = False
+    listener.start()
+    return listener
 
 
 def main():
     parser = argparse.ArgumentParser(description='MiniCPM-o Demo Editor Server')
     parser.add_argument('--port', type=int, default=8080, help='Server port')
+    parser.add_argument('--quiet', action='store_true',
+                        help='Only log warnings and errors (hide per-request logs)')
     args = parser.parse_args()
     
+    listener = _setup_logging(logging.WARNING if args.quiet else logging.INFO)
+    
     server_address = ('', args.port)
-    httpd = ThreadedHTTPServer(server_address, EditorHandler)
+    httpd = PooledHTTPServer(server_address, EditorHandler)
     
     print("=" * 50)
     print("MiniCPM-o Demo Editor Server")
@@ -780,6 +1972,9 @@ def main():
         httpd.serve_forever()
     except KeyboardInterrupt:
         print("\nServer stopped.")
+    finally:
+        httpd.server_close()
+        listener.stop()
 
 
 if __name__ == '__main__':
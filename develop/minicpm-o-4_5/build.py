@@ -14,10 +14,21 @@ Usage:
     python develop/minicpm-o-4_5/build.py
 """
 
+import hashlib
+import io
 import json
+import os
 import shutil
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Union
+from typing import Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 # === 路径配置 ===
@@ -29,6 +40,9 @@ EDIT_TOOL_CONFIG = EDIT_TOOL_DIR / "config" / "data.json"
 RESOURCES_DIR = EDIT_TOOL_DIR / "resources"
 OUTPUT_DIR = REPO_ROOT / "minicpm-o-4_5"
 
+# 并发复制音频的线程数（复制以磁盘 I/O 为主）
+COPY_WORKERS = 8
+
 
 def get_text(obj: Union[str, dict], lang: str = "zh") -> str:
     """从多语言对象中获取指定语言的文本"""
@@ -37,6 +51,15 @@ def get_text(obj: Union[str, dict], lang: str = "zh") -> str:
     return obj
 
 
+def load_json(path: Path) -> dict:
+    """读取 JSON 文件（安装了 orjson 时使用 orjson 解析）"""
+    if orjson:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
 def load_config() -> dict:
     """加载配置文件
     
@@ -46,48 +69,192 @@ def load_config() -> dict:
     """
     if EDIT_TOOL_CONFIG.exists():
         print(f"[INFO] 从 edit_tool 配置加载: {EDIT_TOOL_CONFIG}")
-        with open(EDIT_TOOL_CONFIG, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return load_json(EDIT_TOOL_CONFIG)
     
     print(f"[INFO] 从默认配置加载: {CONFIG_PATH}")
-    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return load_json(CONFIG_PATH)
+
+
+def link_or_copy(src: Union[str, Path], dst: Union[str, Path]):
+    """将 src 硬链接到 dst，不支持时回退为复制
+    
+    同一文件系统内硬链接不复制任何数据（dst 与 resources 中的源文件共享 inode）。
+    这依赖资源文件只被整体替换、从不原地改写：编辑器的上传、ffmpeg 转码和
+    导入复制都先写同目录临时文件再 os.replace（新 inode），已构建的输出不受影响。
+    在编辑器之外原地修改 resources 中的音频，会同时改动已构建的输出。
+    跨文件系统或不支持硬链接时使用 shutil.copy2。
+    已存在的 dst 先删除，避免复制时写穿与其他文件共享的 inode
+    （增量构建不再整体清空输出目录，dst 可能是上次构建留下的硬链接）。
+    """
+    try:
+        os.unlink(dst)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def needs_copy(src: Union[str, Path], dst: Union[str, Path],
+               src_stat: Optional[os.stat_result] = None) -> bool:
+    """判断 dst 是否需要更新（增量构建）
+    
+    dst 不存在时需要；与 src 是同一文件（硬链接）或大小、mtime 都一致时跳过。
+    
+    Args:
+        src: 源文件
+        dst: 目标文件
+        src_stat: 已有的源文件 stat（如 DirEntry.stat() 的缓存结果），传入时不再 stat
+    """
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        return True
+    if src_stat is None:
+        src_stat = os.stat(src)
+    if (src_stat.st_dev, src_stat.st_ino) == (dst_stat.st_dev, dst_stat.st_ino):
+        return False
+    return (src_stat.st_size, src_stat.st_mtime_ns) != (dst_stat.st_size, dst_stat.st_mtime_ns)
+
+
+def prune_output(output_audio_dir: Path, expected: set) -> int:
+    """删除输出目录中已不在资源目录里的音频（case 被删除或文件被移除）
+    
+    Args:
+        output_audio_dir: 输出音频目录
+        expected: 本次构建应存在的输出文件路径集合（str，由 copy_resources 生成）
+    
+    Returns:
+        删除的文件数
+    """
+    expected_dirs = {os.path.dirname(dst) for dst in expected}
+    removed = 0
+    with os.scandir(output_audio_dir) as it:
+        case_entries = list(it)
+    for case_entry in case_entries:
+        if not case_entry.is_dir():
+            os.unlink(case_entry.path)
+            removed += 1
+            continue
+        with os.scandir(case_entry.path) as it:
+            for entry in it:
+                if entry.path in expected:
+                    continue
+                if entry.is_dir():
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
+                removed += 1
+        if case_entry.path not in expected_dirs:
+            os.rmdir(case_entry.path)
+    return removed
+
+
+def file_digest(path: Union[str, Path]) -> str:
+    """分块计算文件内容的 BLAKE2b 摘要"""
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 
 def copy_resources(output_audio_dir: Path) -> dict:
     """从 edit_tool/resources/audio/ 复制音频到输出目录
     
+    先顺序扫描目录、收集所有 (源, 目标) 文件对，再用线程池并发链接/复制。
+    增量构建：已是最新的输出文件直接跳过，资源中已不存在的输出文件被删除。
+    输出与资源在同一文件系统时每个输出直接硬链接到自己的源文件，不读取音频内容；
+    跨文件系统（需要真正复制）时，多个 case 共用的相同音频（如同一个参考音色
+    ref.mp3）只复制一份，其余目标硬链接到第一份输出。去重只在本次需要写入的
+    文件之间进行，其中大小与其他文件相同的才计算摘要。
+    目录用 os.scandir 遍历（DirEntry 自带文件类型与 stat 缓存），
+    文件路径全程使用 str，不为每个文件构造 Path。
+    
     Args:
         output_audio_dir: 输出音频目录 (minicpm-o-4_5/audio/)
     
     Returns:
-        统计信息 {"files": int, "cases": int}
+        统计信息 {"files": int, "cases": int, "deduplicated": int,
+                  "updated": int, "removed": int}
     """
     source_audio_dir = RESOURCES_DIR / "audio"
-    stats = {"files": 0, "cases": 0}
+    stats = {"files": 0, "cases": 0, "deduplicated": 0, "updated": 0, "removed": 0}
     
     if not source_audio_dir.exists():
         print(f"[WARN] 资源目录不存在: {source_audio_dir}")
+        # 没有任何资源：清空已发布的旧音频（与原先整体清空输出目录一致）
+        if os.path.isdir(output_audio_dir):
+            stats["removed"] = prune_output(output_audio_dir, set())
         return stats
     
-    for case_dir in sorted(source_audio_dir.iterdir()):
-        if not case_dir.is_dir():
-            continue
-        
-        target_case_dir = output_audio_dir / case_dir.name
-        target_case_dir.mkdir(parents=True, exist_ok=True)
+    with os.scandir(source_audio_dir) as it:
+        case_entries = sorted((e for e in it if e.is_dir()), key=lambda e: e.name)
+    
+    # 增量构建时大部分 case 目录已存在：列一次输出目录，只为缺失的 case 调用 mkdir
+    os.makedirs(output_audio_dir, exist_ok=True)
+    with os.scandir(output_audio_dir) as it:
+        existing_dirs = {e.name for e in it if e.is_dir()}
+    
+    copy_pairs = []  # [(源路径, 目标路径, 源文件 stat)]
+    for case_entry in case_entries:
+        target_case_dir = os.path.join(output_audio_dir, case_entry.name)
+        if case_entry.name not in existing_dirs:
+            os.mkdir(target_case_dir)
         
-        file_count = 0
-        for audio_file in sorted(case_dir.iterdir()):
-            if audio_file.is_file() and audio_file.suffix in ('.mp3', '.wav', '.ogg', '.m4a'):
-                shutil.copy2(audio_file, target_case_dir / audio_file.name)
-                file_count += 1
+        with os.scandir(case_entry.path) as it:
+            audio_entries = sorted(
+                (e for e in it
+                 if e.is_file() and os.path.splitext(e.name)[1] in ('.mp3', '.wav', '.ogg', '.m4a')),
+                key=lambda e: e.name
+            )
+        for audio_entry in audio_entries:
+            # DirEntry.stat() 结果已缓存，增量判断直接复用，不再逐个 stat 源文件
+            copy_pairs.append((audio_entry.path, os.path.join(target_case_dir, audio_entry.name),
+                               audio_entry.stat()))
         
+        file_count = len(audio_entries)
         if file_count > 0:
             stats["cases"] += 1
             stats["files"] += file_count
-            print(f"  复制 {case_dir.name}: {file_count} 个音频文件")
+            print(f"  复制 {case_entry.name}: {file_count} 个音频文件")
+    
+    with ThreadPoolExecutor(max_workers=COPY_WORKERS) as pool:
+        # 先筛出需要更新的文件，已是最新的输出不参与去重、不计算摘要
+        stale = list(pool.map(lambda pair: needs_copy(*pair), copy_pairs))
+        stale_pairs = [(src, dst, st) for (src, dst, st), flag in zip(copy_pairs, stale) if flag]
+        
+        # 同一文件系统内硬链接不复制数据，无需去重；
+        # 否则大小相同的文件才可能内容相同，只为这些文件计算摘要
+        if os.stat(source_audio_dir).st_dev == os.stat(output_audio_dir).st_dev:
+            candidates = []
+        else:
+            size_counts = Counter(st.st_size for _, _, st in stale_pairs)
+            candidates = [src for src, _, st in stale_pairs if size_counts[st.st_size] > 1]
+        digests = dict(zip(candidates, pool.map(file_digest, candidates)))
+        
+        first_output = {}  # digest -> 第一份输出文件
+        unique_pairs = []  # (源, 目标)
+        duplicate_pairs = []  # (已输出的相同文件, 目标)
+        for src, dst, _ in stale_pairs:
+            digest = digests.get(src)
+            if digest is None:
+                unique_pairs.append((src, dst))
+            elif digest in first_output:
+                duplicate_pairs.append((first_output[digest], dst))
+            else:
+                first_output[digest] = dst
+                unique_pairs.append((src, dst))
+        
+        # list 遍历 map 结果，使任一复制失败的异常在此抛出；
+        # 重复文件链接到已输出的文件，需等第一批完成后再处理
+        list(pool.map(lambda pair: link_or_copy(*pair), unique_pairs))
+        list(pool.map(lambda pair: link_or_copy(*pair), duplicate_pairs))
     
+    stats["updated"] = len(stale_pairs)
+    stats["deduplicated"] = len(duplicate_pairs)
+    stats["removed"] = prune_output(output_audio_dir, {dst for _, dst, _ in copy_pairs})
     return stats
 
 
@@ -103,53 +270,74 @@ def build_data(config: dict) -> dict:
     Returns:
         最终的数据结构
     """
+    # 各层直接用推导式一次生成，不先建空列表再逐个 append
     output_data = {
         "meta": config.get("meta", {}),
-        "abilities": []
-    }
-    
-    for ability in config.get("abilities", []):
-        output_ability = {
-            "id": ability["id"],
-            "name": ability.get("name", ""),
-            "description": ability.get("description", ""),
-            "sub_abilities": []
-        }
-        
-        for sub_ability in ability.get("sub_abilities", []):
-            output_sub = {
-                "id": sub_ability["id"],
-                "name": sub_ability.get("name", ""),
-                "description": sub_ability.get("description", ""),
-                "cases": []
+        "abilities": [
+            {
+                "id": ability["id"],
+                "name": ability.get("name", ""),
+                "description": ability.get("description", ""),
+                "sub_abilities": [
+                    {
+                        "id": sub_ability["id"],
+                        "name": sub_ability.get("name", ""),
+                        "description": sub_ability.get("description", ""),
+                        "cases": [
+                            {
+                                "id": case["id"],
+                                "summary": case.get("summary", ""),
+                                "system": case.get("system", {}),
+                                "turns": case.get("turns", [])
+                            }
+                            for case in sub_ability.get("cases", [])
+                        ]
+                    }
+                    for sub_ability in ability.get("sub_abilities", [])
+                ]
             }
-            
-            for case in sub_ability.get("cases", []):
-                output_case = {
-                    "id": case["id"],
-                    "summary": case.get("summary", ""),
-                    "system": case.get("system", {}),
-                    "turns": case.get("turns", [])
-                }
-                output_sub["cases"].append(output_case)
-            
-            output_ability["sub_abilities"].append(output_sub)
-        
-        output_data["abilities"].append(output_ability)
+            for ability in config.get("abilities", [])
+        ]
+    }
     
     return output_data
 
 
 def write_data_js(data: dict, output_dir: Path, filename: str = "data.js"):
-    """将数据写入 data.js"""
-    data_js_path = output_dir / filename
-    
-    # 格式化 JSON，便于阅读
-    json_str = json.dumps(data, ensure_ascii=False, indent=2)
+    """将数据写入 data.js
     
-    content = f"// Auto-generated by build.py - DO NOT EDIT\nconst DEMO_DATA = {json_str};\n"
+    安装了 orjson 时直接生成 UTF-8 bytes 写入（输出与标准库一致）；
+    否则经 json.dump 流式写入文件，不在内存中拼接完整字符串。
+    先写同目录的唯一临时文件再原子替换，预览服务器不会读到写了一半的 data.js，
+    并发构建也不会共用临时文件；写入失败时删除临时文件。
+    """
+    data_js_path = output_dir / filename
+    try:
+        mode = data_js_path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o644
+    fd, tmp_path = tempfile.mkstemp(dir=output_dir, prefix=f".{filename}.", suffix=".tmp")
     
-    data_js_path.write_text(content, encoding="utf-8")
+    try:
+        # mkstemp 创建的文件权限为 0600，沿用原文件权限
+        os.fchmod(fd, mode)
+        # 格式化 JSON（2 空格缩进），便于阅读
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"// Auto-generated by build.py - DO NOT EDIT\nconst DEMO_DATA = ")
+            if orjson:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+            else:
+                writer = io.TextIOWrapper(f, encoding="utf-8")
+                json.dump(data, writer, ensure_ascii=False, indent=2)
+                writer.detach()
+            f.write(b";\n")
+        os.replace(tmp_path, data_js_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
     print(f"写入 {data_js_path}")
 
 
@@ -161,19 +349,17 @@ def main():
     print(f"输出目录: {OUTPUT_DIR}")
     print()
     
-    # 清理输出目录中的音频（保留其他文件）
+    # 输出音频目录增量更新（未变化的文件跳过，多余的文件在复制后删除）
     output_audio_dir = OUTPUT_DIR / "audio"
-    if output_audio_dir.exists():
-        print(f"清理音频目录: {output_audio_dir}")
-        shutil.rmtree(output_audio_dir)
-    output_audio_dir.mkdir(parents=True, exist_ok=True)
     
     # 复制音频资源
     print("\n" + "=" * 40)
     print("复制音频资源")
     print("=" * 40)
     audio_stats = copy_resources(output_audio_dir)
-    print(f"  共复制 {audio_stats['cases']} 个 case, {audio_stats['files']} 个文件")
+    print(f"  共复制 {audio_stats['cases']} 个 case, {audio_stats['files']} 个文件"
+          f"（其中 {audio_stats['deduplicated']} 个与其他 case 内容相同，已合并）")
+    print(f"  更新 {audio_stats['updated']} 个文件, 删除 {audio_stats['removed']} 个过期文件")
     
     # 加载配置
     config = load_config()
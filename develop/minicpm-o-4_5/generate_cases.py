@@ -7,8 +7,9 @@ Usage:
 """
 
 import json
+import os
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
 
 SCRIPT_DIR = Path(__file__).parent
@@ -16,50 +17,79 @@ COLLECTED_DIR = SCRIPT_DIR.parent / "collected"
 CONFIG_PATH = SCRIPT_DIR / "config" / "cases.json"
 
 
-def read_first_user_text(session_dir: Path) -> str:
-    """读取第一轮用户输入作为 summary"""
-    asr_file = session_dir / "000_user_audio0.asr.txt"
-    if asr_file.exists():
-        text = asr_file.read_text(encoding="utf-8").strip()
+def _list_names(dir_path: Union[str, Path]) -> set:
+    """一次 scandir 列出目录下的所有文件名"""
+    with os.scandir(dir_path) as it:
+        return {entry.name for entry in it}
+
+
+def read_first_user_text(session_dir: Union[str, Path], names: Optional[set] = None) -> str:
+    """读取第一轮用户输入作为 summary
+    
+    Args:
+        session_dir: session 目录（str 或 Path）
+        names: 目录下已列出的文件名集合（传入时不再逐个 stat）
+    """
+    asr_name = "000_user_audio0.asr.txt"
+    asr_file = os.path.join(session_dir, asr_name)
+    exists = asr_name in names if names is not None else os.path.exists(asr_file)
+    if exists:
+        # 小文件整体按字节读取后一次解码，省去文本模式的 TextIOWrapper 开销
+        with open(asr_file, "rb") as f:
+            text = f.read().decode("utf-8").strip()
         # 截取前50字符
         if len(text) > 50:
             text = text[:50] + "..."
         return text
-    return session_dir.name
+    return os.path.basename(session_dir)
 
 
-def count_turns(session_dir: Path) -> int:
-    """统计对话轮数"""
+def count_turns(session_dir: Union[str, Path], names: Optional[set] = None) -> int:
+    """统计对话轮数
+    
+    Args:
+        session_dir: session 目录（str 或 Path）
+        names: 目录下已列出的文件名集合（传入时不再逐个 stat）
+    """
+    if names is None:
+        names = _list_names(session_dir)
     count = 0
-    while (session_dir / f"{count:03d}_assistant.txt").exists():
+    while f"{count:03d}_assistant.txt" in names:
         count += 1
     return count
 
 
 def scan_sessions(lang_dir: Path) -> dict:
-    """扫描某语言目录下的所有 session"""
+    """扫描某语言目录下的所有 session
+    
+    使用 os.scandir 遍历（DirEntry 自带文件类型，无需额外 stat），
+    每个 session 目录只列一次，轮数与 ASR 文件判断都基于该列表。
+    循环内直接使用 DirEntry.path 字符串，不为每个 session 构造 Path。
+    """
     results = {}
     
-    for category_dir in sorted(lang_dir.iterdir()):
-        if not category_dir.is_dir():
-            continue
-        if category_dir.name == "index.jsonl":
-            continue
-            
-        category_name = category_dir.name
+    with os.scandir(lang_dir) as it:
+        category_entries = sorted((e for e in it if e.is_dir()), key=lambda e: e.name)
+    
+    for category_entry in category_entries:
+        category_name = category_entry.name
         sessions = []
         
-        for session_dir in sorted(category_dir.iterdir()):
-            if not session_dir.is_dir():
-                continue
-            if not session_dir.name.startswith("session_"):
-                continue
+        with os.scandir(category_entry.path) as it:
+            session_entries = sorted(
+                (e for e in it if e.is_dir() and e.name.startswith("session_")),
+                key=lambda e: e.name
+            )
+        
+        for session_entry in session_entries:
+            session_path = session_entry.path
+            names = _list_names(session_path)
             
-            summary = read_first_user_text(session_dir)
-            turns = count_turns(session_dir)
+            summary = read_first_user_text(session_path, names)
+            turns = count_turns(session_path, names)
             
             sessions.append({
-                "session_id": session_dir.name,
+                "session_id": session_entry.name,
                 "summary": summary,
                 "turns": turns
             })
@@ -138,9 +168,10 @@ def main():
         }
     }
     
-    # 加载现有配置
-    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-        config = json.load(f)
+    # 加载现有配置（保留原始内容，用于判断是否需要写回）
+    with open(CONFIG_PATH, "rb") as f:
+        old_content = f.read()
+    config = json.loads(old_content)
     
     # 填充 cases
     for ability in config["abilities"]:
@@ -175,9 +206,14 @@ def main():
             sub["cases"] = cases
             print(f"\n{ability['name']} > {sub['name']}: 添加 {len(cases)} 个 cases")
     
-    # 保存配置
-    with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-        json.dump(config, f, ensure_ascii=False, indent=2)
+    # 保存配置（内容未变化时不重写文件）
+    new_content = json.dumps(config, ensure_ascii=False, indent=2).encode("utf-8")
+    if new_content == old_content:
+        print(f"\n✅ 配置未变化，无需写入: {CONFIG_PATH}")
+        return
+    
+    with open(CONFIG_PATH, "wb") as f:
+        f.write(new_content)
     
     print(f"\n✅ 已保存到: {CONFIG_PATH}")
 